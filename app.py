@@ -6,12 +6,36 @@ from modules.categorize_transactions import categorize_transactions, summarize_c
 # -------------------- Page Setup --------------------
 st.set_page_config(page_title="FinGenie (Lite)", page_icon="💰", layout="wide")
 
+# -------------------- Cached Pipeline --------------------
+# Streamlit reruns this script on every interaction; keying on the raw PDF bytes
+# means re-renders of the same upload skip extraction, parsing and categorizing.
+@st.cache_data(show_spinner=False, max_entries=16)
+def analyze_statement(raw: bytes):
+    df, raw_text, meta = process_pdf_to_df(raw, return_text=True)
+    if df.empty:
+        return df, raw_text, meta, None, None
+    df = categorize_transactions(df)
+    return df, raw_text, meta, compute_basic_stats(df), summarize_categories(df)
+
+
+# Static assets are read from disk once per process, not on every rerun
+@st.cache_resource
+def css_block():
+    with open("styles/style.css", "r", encoding="utf-8") as css:
+        return f"<style>{css.read()}</style>"
+
+
+@st.cache_resource
+def logo_bytes():
+    with open("assets/fingenie_logo.png", "rb") as logo:
+        return logo.read()
+
+
 # Apply CSS Theme
-with open("styles/style.css", "r", encoding="utf-8") as css:
-    st.markdown(f"<style>{css.read()}</style>", unsafe_allow_html=True)
+st.markdown(css_block(), unsafe_allow_html=True)
 
 # Sidebar
-st.sidebar.image("assets/fingenie_logo.png", width=160)
+st.sidebar.image(logo_bytes(), width=160)
 st.sidebar.markdown("### FinGenie (Lite)")
 st.sidebar.caption("Smart dummy financial analyzer 💸")
 
@@ -26,7 +50,7 @@ with tab1:
 
     if uploaded:
         with st.spinner("Processing your statement..."):
-            df, raw_text, meta = process_pdf_to_df(uploaded, return_text=True)
+            df, raw_text, meta, stats, cat_summary = analyze_statement(uploaded.getvalue())
 
         # --- Debug Info ---
         with st.expander("Extraction Debug"):
@@ -41,13 +65,9 @@ with tab1:
         if df.empty:
             st.error("Could not parse any transactions.")
         else:
-            df = categorize_transactions(df)
             st.success("✅ Parsed & categorized successfully!")
 
             # Summary Metrics
-            stats = compute_basic_stats(df)
-            cat_summary = summarize_categories(df)
-
             c1, c2, c3, c4 = st.columns(4)
             c1.metric("Transactions", stats["n_txn"])
             c2.metric("Total Debits", f"₹{stats['sum_debits']:,.2f}")
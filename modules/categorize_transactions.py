@@ -13,16 +13,31 @@ CATEGORY_RULES = {
     r"grocery|grocer": "Groceries",
 }
 
+# Later rules take precedence over earlier ones, so the union is built in reverse
+# rule order: each alternative is a lookahead over the whole description and the
+# first one that matches names the winning category.
+_MASTER = re.compile(
+    "^(?:" + "|".join(
+        f"(?=.*?(?P<g{i}>{pattern}))"
+        for i, pattern in reversed(list(enumerate(CATEGORY_RULES)))
+    ) + ")",
+    re.IGNORECASE,
+)
+_CATEGORY_FOR_GROUP = {f"g{i}": cat for i, cat in enumerate(CATEGORY_RULES.values())}
+# alphabetical, like the object-dtype groupby this replaced, so ties and summary order are unchanged
+_CATEGORY_DTYPE = pd.CategoricalDtype(sorted(set(CATEGORY_RULES.values()) | {"Other"}))
+
+def _category_of(desc: str) -> str:
+    m = _MASTER.match(desc)
+    return _CATEGORY_FOR_GROUP[m.lastgroup] if m else "Other"
+
 def categorize_transactions(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["Category"] = "Other"
-    for pattern, cat in CATEGORY_RULES.items():
-        mask = df["Description"].str.lower().str.contains(pattern)
-        df.loc[mask, "Category"] = cat
-    return df
+    desc = df["Description"].astype(str).to_numpy(dtype=object)
+    cats = pd.Categorical([_category_of(s) for s in desc], dtype=_CATEGORY_DTYPE)
+    return df.assign(Category=cats)
 
 def summarize_categories(df: pd.DataFrame):
-    spent = df[df["Type"].str.upper().eq("DEBIT")].groupby("Category")["Amount"].sum()
+    spent = df.loc[df["Type"] == "Debit"].groupby("Category", observed=True)["Amount"].sum()
     if spent.empty:
         return {"top_category": None, "max_spent": 0, "summary": {}}
     top_cat = spent.idxmax()
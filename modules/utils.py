@@ -1,18 +1,15 @@
-import pdfplumber
+import numpy as np
 import pandas as pd
+import importlib
 import re
+from functools import lru_cache
 from io import BytesIO
-from datetime import datetime
-
-try:
-    import fitz  # fallback
-except Exception:
-    fitz = None
+from urllib.parse import quote_plus
 
 
 # -------------------- MAIN ENTRY --------------------
-def process_pdf_to_df(uploaded_file, return_text=False):
-    text, meta = extract_text(uploaded_file)
+def process_pdf_to_df(uploaded_file, return_text=False, password=None):
+    text, meta = extract_text(uploaded_file, password=password)
     if not text.strip():
         df = pd.DataFrame(columns=["Date", "Description", "Debit", "Credit", "Balance", "Type"])
         return (df, text, meta) if return_text else df
@@ -22,38 +19,92 @@ def process_pdf_to_df(uploaded_file, return_text=False):
 
 
 # -------------------- TEXT EXTRACTION --------------------
-def extract_text(uploaded_file):
-    diag = {"engine": "", "pages": 0, "note": ""}
-    raw = uploaded_file.read() if hasattr(uploaded_file, "read") else uploaded_file.getvalue()
-
+def _optional_import(name):
+    # PDF engines are imported on first use so app start-up doesn't pay for them
     try:
-        with pdfplumber.open(BytesIO(raw)) as pdf:
-            diag["engine"] = "pdfplumber"
-            diag["pages"] = len(pdf.pages)
-            text = "\n".join([p.extract_text() or "" for p in pdf.pages])
-            if text.strip():
-                diag["note"] = "Extracted via pdfplumber"
-                return text, diag
-    except Exception as e:
-        diag["note"] = f"pdfplumber failed: {e}"
-
-    if fitz:
+        return importlib.import_module(name)
+    except Exception:
+        return None
+
+
+def extract_text(uploaded_file, password=None):
+    diag = {"engine": "", "pages": 0, "note": ""}
+    # Take the bytes once and hand the same buffer to whichever engine runs;
+    # getvalue() doesn't depend on the stream position, unlike read().
+    if isinstance(uploaded_file, (bytes, bytearray)):
+        raw = uploaded_file
+    else:
+        raw = uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+
+    mupdf_text, mupdf_diag = "", None
+    pymupdf = _optional_import("pymupdf")  # primary engine
+    if pymupdf:
         try:
-            doc = fitz.open(stream=raw, filetype="pdf")
-            diag["engine"] = "pymupdf"
-            diag["pages"] = len(doc)
-            text = "\n".join([page.get_text('text') for page in doc])
-            if text.strip():
+            doc = pymupdf.open(stream=raw, filetype="pdf")
+            try:
+                if password:
+                    doc.authenticate(password)
+                diag["engine"] = "pymupdf"
+                diag["pages"] = len(doc)
+                # sort=True rebuilds rows from span positions (PyMuPDF >= 1.24.11),
+                # so table cells drawn one by one come out on a single line per row
+                mupdf_text = "\n".join([page.get_text("text", sort=True) for page in doc])
+            finally:
+                doc.close()
+            if _TXN_RE.search(mupdf_text):
                 diag["note"] = "Extracted via PyMuPDF"
-                return text, diag
+                return mupdf_text, diag
+            mupdf_diag = dict(diag, note="Extracted via PyMuPDF (no transactions found)")
         except Exception as e:
             diag["note"] = f"pymupdf failed: {e}"
 
+    # Text without any recognisable transaction rows gets a second try with pdfplumber
+    pdfplumber = _optional_import("pdfplumber")  # fallback
+    if pdfplumber:
+        try:
+            if hasattr(uploaded_file, "seek"):
+                uploaded_file.seek(0)
+                stream = uploaded_file
+            else:
+                stream = BytesIO(raw)
+            with pdfplumber.open(stream, password=password) as pdf:
+                diag["engine"] = "pdfplumber"
+                diag["pages"] = len(pdf.pages)
+                text = "\n".join([_plumber_page_text(p) for p in pdf.pages])
+                if text.strip() and (_TXN_RE.search(text) or not mupdf_text.strip()):
+                    diag["note"] = "Extracted via pdfplumber"
+                    return text, diag
+        except Exception as e:
+            diag["note"] = f"pdfplumber failed: {e}"
+
+    if mupdf_text.strip():
+        return mupdf_text, mupdf_diag
+
     diag["note"] = "No text found"
     return "", diag
 
 
+def _plumber_page_text(page):
+    # Plain top-to-bottom text is all the parser needs; extract_text_simple
+    # skips the word clustering of extract_text, and passing laparams would
+    # switch on pdfminer's layout analysis, which is slower still.
+    try:
+        return page.extract_text_simple() or ""
+    finally:
+        page.close()  # drop the page's cached chars/objects straight away
+
+
 # -------------------- PARSER --------------------
+# date  value_date  description...  amount  balance  type
+# [^\S\r\n] is any whitespace except a line break (NBSP included), like str.split()
+_TXN_RE = re.compile(
+    r"^[^\S\r\n]*(?P<date>\d{2}/\d{2}/\d{4})[^\S\r\n]+\S+[^\S\r\n]+(?P<desc>.+?)"
+    r"[^\S\r\n]+(?P<amt>-?[\d,]*\d(?:\.\d+)?)[^\S\r\n]+(?P<bal>-?[\d,]*\d(?:\.\d+)?)"
+    r"[^\S\r\n]+(?P<type>\S+)[^\S\n]*$",
+    re.MULTILINE,
+)
+
+
 def parse_kotak_statement(text: str) -> pd.DataFrame:
     """
     Handles lines like:
@@ -61,61 +112,35 @@ def parse_kotak_statement(text: str) -> pd.DataFrame:
     03/09/2025 03/09/2025 POS PURCHASE - AMAZON -1299 88351 DEBIT
     """
 
-    lines = [
-        ln.strip()
-        for ln in text.splitlines()
-        if re.match(r"^\d{2}/\d{2}/\d{4}", ln)
-        and "BALANCE" not in ln.upper()
-        and "OPENING" not in ln.upper()
-    ]
-
-    data = []
-    for ln in lines:
-        # normalize spaces
-        ln = re.sub(r"\s+", " ", ln).strip()
-        parts = ln.split()
-        if len(parts) < 6:
+    dates, descs, amounts, balances, labels = [], [], [], [], []
+    for m in _TXN_RE.finditer(text):
+        line = m.group(0).upper()
+        if "BALANCE" in line or "OPENING" in line:
             continue
+        dates.append(m.group("date"))
+        descs.append(" ".join(m.group("desc").split()))
+        amounts.append(m.group("amt"))
+        balances.append(m.group("bal"))
+        labels.append(m.group("type"))
 
-        date = parts[0]
-        value_date = parts[1]
-        ttype = parts[-1].upper()
-        balance = safe_float(parts[-2])
+    if not dates:
+        return pd.DataFrame(columns=["Date", "Description", "Debit", "Credit", "Balance", "Type"])
 
-        # extract all numbers
-        nums = re.findall(r"-?\d+(?:\.\d+)?", ln)
-        if not nums:
-            continue
+    amount = _to_numbers(amounts)
+    labels = pd.Series(labels, dtype=str).str.upper()
 
-        # last number = balance, second last = amount
-        if len(nums) >= 2:
-            amount = float(nums[-2])
-        else:
-            amount = float(nums[-1])
-
-        # determine type by sign or label
-        if amount < 0 or "DEBIT" in ttype:
-            txn_type = "Debit"
-            debit, credit = abs(amount), 0.0
-        else:
-            txn_type = "Credit"
-            debit, credit = 0.0, amount
-
-        # description is between value_date and amount
-        desc = " ".join(parts[2:-3]).strip()
-
-        data.append({
-            "Date": safe_date(date),
-            "Description": desc,
-            "Debit": debit,
-            "Credit": credit,
-            "Balance": balance,
-            "Type": txn_type
-        })
-
-    df = pd.DataFrame(data)
-    if df.empty:
-        return pd.DataFrame(columns=["Date", "Description", "Debit", "Credit", "Balance", "Type"])
+    # determine type by sign or label
+    is_debit = (amount < 0) | labels.str.contains("DEBIT", regex=False).to_numpy()
+    amount = np.abs(amount)
+
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(pd.Series(dates), format="%d/%m/%Y", errors="coerce").dt.date,
+        "Description": descs,
+        "Debit": np.where(is_debit, amount, 0.0),
+        "Credit": np.where(is_debit, 0.0, amount),
+        "Balance": _to_numbers(balances),
+        "Type": pd.Categorical(np.where(is_debit, "Debit", "Credit"), categories=["Debit", "Credit"]),
+    })
 
     # Add combined Amount column for visualization
     df["Amount"] = df["Debit"] + df["Credit"]
@@ -123,13 +148,8 @@ def parse_kotak_statement(text: str) -> pd.DataFrame:
 
 
 # -------------------- HELPERS --------------------
-def safe_date(s):
-    for fmt in ("%d/%m/%Y", "%d-%m-%Y"):
-        try:
-            return datetime.strptime(s, fmt).date()
-        except:
-            pass
-    return s
+def _to_numbers(values):
+    return pd.Series(values, dtype=str).str.replace(",", "", regex=False).astype(float).to_numpy()
 
 
 def safe_float(x):
@@ -156,39 +176,41 @@ def compute_basic_stats(df):
 
 
 # -------------------- OFFLINE CHATBOT --------------------
-def mini_chatbot(msg: str) -> str:
-    msg = msg.lower().strip()
-    
-    if "budget" in msg or "plan" in msg:
-        return "Follow the 50/30/20 rule — 50% needs, 30% wants, 20% savings. Track your spending weekly."
-    if "save" in msg or "saving" in msg:
-        return "Start small auto-savings after every income. Avoid impulse purchases and review monthly."
-    if "invest" in msg or "investment" in msg:
-        return "Begin with SIPs in index funds or ETFs. Focus on long-term compounding, not short-term profit."
-    if "credit" in msg or "card" in msg:
-        return "Use credit cards smartly: keep usage under 30%, pay full dues monthly, and never miss due dates."
-    if "loan" in msg or "emi" in msg:
-        return "Avoid high-interest personal loans. Keep EMIs under 20% of income for financial safety."
-    if "emergency" in msg:
-        return "Keep an emergency fund equal to 3-6 months of expenses in a liquid savings account."
-    if "student" in msg or "college" in msg:
-        return "For students: track expenses with apps, cook meals, and save ₹500-₹1000 monthly."
-    if "risk" in msg or "crypto" in msg:
-        return "Limit risky assets like crypto to <10% of your portfolio. Focus on mutual funds or PPF."
-    if "discipline" in msg or "habit" in msg:
-        return "Automate savings, review expenses weekly, and reward yourself for consistency."
-    if "rich" in msg or "wealth" in msg:
-        return "Wealth grows from habits: earn, save, invest, and stay patient — compounding does the rest."
-
-    return "Ask me about budgeting, saving, investing, loans, or money habits — I’m your offline FinGenie!"
+# Checked in order: the first intent with a keyword anywhere in the message wins.
+# Substring (not whole-word) matching keeps "budgeting" or "investing" working.
+_INTENTS = (
+    (("budget", "plan"), "Follow the 50/30/20 rule — 50% needs, 30% wants, 20% savings. Track your spending weekly."),
+    (("save", "saving"), "Start small auto-savings after every income. Avoid impulse purchases and review monthly."),
+    (("invest", "investment"), "Begin with SIPs in index funds or ETFs. Focus on long-term compounding, not short-term profit."),
+    (("credit", "card"), "Use credit cards smartly: keep usage under 30%, pay full dues monthly, and never miss due dates."),
+    (("loan", "emi"), "Avoid high-interest personal loans. Keep EMIs under 20% of income for financial safety."),
+    (("emergency",), "Keep an emergency fund equal to 3-6 months of expenses in a liquid savings account."),
+    (("student", "college"), "For students: track expenses with apps, cook meals, and save ₹500-₹1000 monthly."),
+    (("risk", "crypto"), "Limit risky assets like crypto to <10% of your portfolio. Focus on mutual funds or PPF."),
+    (("discipline", "habit"), "Automate savings, review expenses weekly, and reward yourself for consistency."),
+    (("rich", "wealth"), "Wealth grows from habits: earn, save, invest, and stay patient — compounding does the rest."),
+)
+_DEFAULT_REPLY = "Ask me about budgeting, saving, investing, loans, or money habits — I’m your offline FinGenie!"
+
 
+def mini_chatbot(msg: str) -> str:
+    msg = msg.casefold().strip()
+    for keywords, reply in _INTENTS:
+        if any(k in msg for k in keywords):
+            return reply
+    return _DEFAULT_REPLY
 
 
 # -------------------- FINANCE VIDEOS --------------------
+_YT_SEARCH_URL = "https://www.youtube.com/results?search_query="
+
+
+# Returns a tuple so the cached result can't be mutated by callers
+@lru_cache(maxsize=128)
 def youtube_search_links(topic: str, n=8):
-    topic_q = "+".join(topic.split())
-    base = "https://www.youtube.com/results?search_query="
-    links = [
-        ("Search Results", base + topic_q)
-    ]
+    # quote_plus also escapes &, #, ? etc. that would otherwise break the query string
+    topic_q = quote_plus(" ".join(topic.split()))
+    links = (
+        ("Search Results", _YT_SEARCH_URL + topic_q),
+    )
     return links[:n]